@@ -1,7 +1,6 @@
 # This file is Copyright 2019 Volatility Foundation and licensed under the Volatility Software License 1.0
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
-import binascii
 import code
 import io
 import random
@@ -19,9 +18,33 @@ try:
     import capstone
 
     has_capstone = True
+    # Architecture and mode used to construct the disassembly engine for each architecture name
+    _disassembly_modes = {
+        'intel': (capstone.CS_ARCH_X86, capstone.CS_MODE_32),
+        'intel64': (capstone.CS_ARCH_X86, capstone.CS_MODE_64),
+        'arm': (capstone.CS_ARCH_ARM, capstone.CS_MODE_ARM),
+        'arm64': (capstone.CS_ARCH_ARM64, capstone.CS_MODE_ARM)
+    }
 except ImportError:
     has_capstone = False
 
+# Disassembly engines are expensive to construct, so they are only built once per architecture
+_disassembly_engines = {}  # type: Dict[str, Any]
+
+
+def _get_disassembly_engine(architecture: str) -> 'capstone.Cs':
+    """Returns the (lazily constructed) capstone engine for an architecture"""
+    engine = _disassembly_engines.get(architecture)
+    if engine is None:
+        engine = _disassembly_engines[architecture] = capstone.Cs(*_disassembly_modes[architecture])
+        # Instruction details are never displayed, and skipping them is considerably faster
+        engine.detail = False
+    return engine
+
+
+# Translation table that renders printable characters as themselves and everything else as a dot
+_ASCII_TABLE = bytes([c if 32 < c < 127 else ord('.') for c in range(256)])
+
 
 class Volshell(interfaces.plugins.PluginInterface):
     """Shell environment to directly interact with a memory image."""
@@ -30,6 +53,7 @@ class Volshell(interfaces.plugins.PluginInterface):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.__current_layer = None  # type: Optional[str]
+        self._locals = None  # type: Optional[List[Tuple[List[str], Any]]]
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -47,6 +71,7 @@ class Volshell(interfaces.plugins.PluginInterface):
         """
 
         self._current_layer = self.config['primary']
+        locals_dict = self._construct_locals_dict()
 
         # Try to enable tab completion
         try:
@@ -55,7 +80,7 @@ class Volshell(interfaces.plugins.PluginInterface):
             pass
         else:
             import rlcompleter
-            completer = rlcompleter.Completer(namespace = self._construct_locals_dict())
+            completer = rlcompleter.Completer(namespace = locals_dict)
             readline.set_completer(completer.complete)
             readline.parse_and_bind("tab: complete")
             print("Readline imported successfully")
@@ -72,8 +97,8 @@ class Volshell(interfaces.plugins.PluginInterface):
     Current Layer: {}
         """.format(mode, self.current_layer)
 
-        sys.ps1 = "({}) >>> ".format(self.current_layer)
-        code.interact(banner = banner, local = self._construct_locals_dict())
+        sys.ps1 = "(%s) >>> " % self.current_layer
+        code.interact(banner = banner, local = locals_dict)
 
         return renderers.TreeGrid([("Terminating", str)], None)
 
@@ -83,19 +108,17 @@ class Volshell(interfaces.plugins.PluginInterface):
             help(*args)
             return
 
+        methods = []
         variables = []
-        print("\nMethods:")
-        for aliases, item in self.construct_locals():
+        for aliases, item in self._cached_locals():
             name = ", ".join(aliases)
-            if item.__doc__ and callable(item):
-                print("* {}".format(name))
-                print("    {}".format(item.__doc__))
+            doc = getattr(item, '__doc__', None)
+            if doc and callable(item):
+                methods.append("* %s\n    %s\n" % (name, doc))
             else:
-                variables.append(name)
+                variables.append("  %s\n" % name)
 
-        print("\nVariables:")
-        for var in variables:
-            print("  {}".format(var))
+        sys.stdout.write("\nMethods:\n" + "".join(methods) + "\nVariables:\n" + "".join(variables))
 
     def construct_locals(self) -> List[Tuple[List[str], Any]]:
         """Returns a dictionary listing the functions to be added to the
@@ -110,10 +133,16 @@ class Volshell(interfaces.plugins.PluginInterface):
                                                                          'render_treegrid'], self.render_treegrid),
                 (['ds', 'display_symbols'], self.display_symbols), (['hh', 'help'], self.help)]
 
+    def _cached_locals(self) -> List[Tuple[List[str], Any]]:
+        """Returns the locals for the environment, constructing them only once"""
+        if self._locals is None:
+            self._locals = self.construct_locals()
+        return self._locals
+
     def _construct_locals_dict(self) -> Dict[str, Any]:
         """Returns a dictionary of the locals """
         result = {}
-        for aliases, value in self.construct_locals():
+        for aliases, value in self._cached_locals():
             for alias in aliases:
                 result[alias] = value
         return result
@@ -126,32 +155,49 @@ class Volshell(interfaces.plugins.PluginInterface):
         """Display a series of bytes"""
         chunk_size = struct.calcsize(format_string)
         data_length = len(remaining_data)
-        remaining_data = remaining_data[:data_length - (data_length % chunk_size)]
-
-        while remaining_data:
-            current_line, remaining_data = remaining_data[:16], remaining_data[16:]
-
-            data_blocks = [current_line[chunk_size * i:chunk_size * (i + 1)] for i in range(16 // chunk_size)]
-            data_blocks = [x for x in data_blocks if x != b'']
-            valid_data = [("{:0" + str(2 * chunk_size) + "x}").format(struct.unpack(format_string, x)[0])
-                          for x in data_blocks]
-            padding_data = [" " * 2 * chunk_size for _ in range((16 - len(current_line)) // chunk_size)]
-            hex_data = " ".join(valid_data + padding_data)
+        # Values are displayed most significant byte first, so for little endian formats the data is reversed
+        # (which reverses the bytes within every value) and the order of the values is then restored per line
+        reverse = chunk_size > 1 and (format_string[0] == '<' or
+                                      (format_string[0] not in '>!' and sys.byteorder == 'little'))
+        hex_width = 2 * chunk_size
+        # Partial lines are padded with blank space out to the width of a full line
+        line_width = (16 // chunk_size) * (hex_width + 1) - 1
+        data_view = memoryview(remaining_data)[:data_length - (data_length % chunk_size)]
+        data_length = len(data_view)
+
+        # Convert all the data at once, and then slice each line out of the converted strings
+        source = data_view[::-1] if reverse else data_view
+        all_hex = source.hex()
+        all_ascii = self._ascii_bytes(source) if ascii else ""
+
+        lines = []
+        for line_start in range(0, data_length, 16):
+            line_length = min(16, data_length - line_start)
+            start = data_length - line_start - line_length if reverse else line_start
+
+            line_hex = all_hex[2 * start:2 * (start + line_length)]
+            valid_data = [line_hex[i:i + hex_width] for i in range(0, len(line_hex), hex_width)]
+            if reverse:
+                valid_data.reverse()
+            hex_data = " ".join(valid_data).ljust(line_width)
 
             ascii_data = ""
             if ascii:
-                connector = " "
-                if chunk_size < 2:
-                    connector = ""
-                ascii_data = connector.join([self._ascii_bytes(x) for x in valid_data])
+                ascii_data = all_ascii[start:start + line_length]
+                if chunk_size > 1:
+                    ascii_values = [ascii_data[i:i + chunk_size] for i in range(0, line_length, chunk_size)]
+                    if reverse:
+                        ascii_values.reverse()
+                    ascii_data = " ".join(ascii_values)
+
+            lines.append("%#x    %s    %s\n" % (offset + line_start, hex_data, ascii_data))
 
-            print(hex(offset), "  ", hex_data, "  ", ascii_data)
-            offset += 16
+        sys.stdout.write("".join(lines))
 
     @staticmethod
-    def _ascii_bytes(bytes):
+    def _ascii_bytes(data: Union[bytes, memoryview]) -> str:
         """Converts bytes into an ascii string"""
-        return "".join([chr(x) if 32 < x < 127 else '.' for x in binascii.unhexlify(bytes)])
+        return bytes(data).translate(_ASCII_TABLE).decode('latin-1')
 
     @property
     def current_layer(self):
@@ -162,7 +208,7 @@ class Volshell(interfaces.plugins.PluginInterface):
         if not layer_name:
             layer_name = self.config['primary']
         self._current_layer = layer_name
-        sys.ps1 = "({}) >>> ".format(self.current_layer)
+        sys.ps1 = "(%s) >>> " % self.current_layer
 
     def display_bytes(self, offset, count = 128, layer_name = None):
         """Displays byte values and ASCII characters"""
@@ -184,25 +230,30 @@ class Volshell(interfaces.plugins.PluginInterface):
         remaining_data = self._read_data(offset, count = count, layer_name = layer_name)
         self._display_data(offset, remaining_data, format_string = "H")
 
-    def disassemble(self, offset, count = 128, layer_name = None, architecture = None):
-        """Disassembles a number of instructions from the code at offset"""
-        remaining_data = self._read_data(offset, count = count, layer_name = layer_name)
-        if not has_capstone:
-            print("Capstone not available - please install it to use the disassemble command")
-        else:
-            if isinstance(self.context.layers[layer_name or self.current_layer], intel.Intel32e):
+    # The capstone check is made once, when the class is defined, rather than on every call
+    if has_capstone:
+
+        def disassemble(self, offset, count = 128, layer_name = None, architecture = None):
+            """Disassembles a number of instructions from the code at offset"""
+            layer_name = layer_name or self.current_layer
+            remaining_data = self._read_data(offset, count = count, layer_name = layer_name)
+            layer = self.context.layers[layer_name]
+            if isinstance(layer, intel.Intel32e):
                 architecture = 'intel64'
-            elif isinstance(self.context.layers[layer_name or self.current_layer], intel.Intel):
+            elif isinstance(layer, intel.Intel):
                 architecture = 'intel'
-            disasm_types = {
-                'intel': capstone.Cs(capstone.CS_ARCH_X86, capstone.CS_MODE_32),
-                'intel64': capstone.Cs(capstone.CS_ARCH_X86, capstone.CS_MODE_64),
-                'arm': capstone.Cs(capstone.CS_ARCH_ARM, capstone.CS_MODE_ARM),
-                'arm64': capstone.Cs(capstone.CS_ARCH_ARM64, capstone.CS_MODE_ARM)
-            }
             if architecture is not None:
-                for i in disasm_types[architecture].disasm(remaining_data, offset):
-                    print("0x%x:\t%s\t%s" % (i.address, i.mnemonic, i.op_str))
+                lines = []
+                # disasm_lite (available since capstone 3.0) avoids constructing an instruction object per result
+                for address, _size, mnemonic, op_str in _get_disassembly_engine(architecture).disasm_lite(
+                        remaining_data, offset):
+                    lines.append("0x%x:\t%s\t%s\n" % (address, mnemonic, op_str))
+                sys.stdout.write("".join(lines))
+    else:
+
+        def disassemble(self, offset, count = 128, layer_name = None, architecture = None):
+            """Disassembles a number of instructions from the code at offset"""
+            print("Capstone not available - please install it to use the disassemble command")
 
     def display_type(self,
                      object: Union[str, interfaces.objects.ObjectInterface, interfaces.objects.Template],
@@ -234,27 +285,30 @@ class Volshell(interfaces.plugins.PluginInterface):
                                                         'signed' if data_format.signed else 'unsigned'))
 
         if hasattr(volobject.vol, 'members'):
+            members = []
             longest_member = longest_offset = longest_typename = 0
-            for member in volobject.vol.members:
-                relative_offset, member_type = volobject.vol.members[member]
+            for member, (relative_offset, member_type) in volobject.vol.members.items():
+                hex_offset = hex(relative_offset)
+                type_name = member_type.vol.type_name
+                members.append((relative_offset, member, hex_offset, type_name))
                 longest_member = max(len(member), longest_member)
-                longest_offset = max(len(hex(relative_offset)), longest_offset)
-                longest_typename = max(len(member_type.vol.type_name), longest_typename)
-
-            for member in sorted(volobject.vol.members, key = lambda x: (volobject.vol.members[x][0], x)):
-                relative_offset, member_type = volobject.vol.members[member]
-                len_offset = len(hex(relative_offset))
-                len_member = len(member)
-                len_typename = len(member_type.vol.type_name)
-                if isinstance(volobject, interfaces.objects.ObjectInterface):
-                    # We're an instance, so also display the data
-                    print(" " * (longest_offset - len_offset), hex(relative_offset), ":  ", member,
-                          " " * (longest_member - len_member), "  ",
-                          member_type.vol.type_name, " " * (longest_typename - len_typename), "  ",
-                          self._display_value(getattr(volobject, member)))
-                else:
-                    print(" " * (longest_offset - len_offset), hex(relative_offset), ":  ", member,
-                          " " * (longest_member - len_member), "  ", member_type.vol.type_name)
+                longest_offset = max(len(hex_offset), longest_offset)
+                longest_typename = max(len(type_name), longest_typename)
+
+            lines = []
+            try:
+                for _, member, hex_offset, type_name in sorted(members):
+                    if isinstance(volobject, interfaces.objects.ObjectInterface):
+                        # We're an instance, so also display the data
+                        lines.append(" %*s :   %-*s     %-*s     %s\n" %
+                                     (longest_offset, hex_offset, longest_member, member, longest_typename,
+                                      type_name, self._display_value(getattr(volobject, member))))
+                    else:
+                        lines.append(" %*s :   %-*s     %s\n" %
+                                     (longest_offset, hex_offset, longest_member, member, type_name))
+            finally:
+                # Members read before an invalid one should still be displayed
+                sys.stdout.write("".join(lines))
 
     @classmethod
     def _display_value(self, value: Any) -> str: